@@ -11,17 +11,75 @@ Description: TTS点名，保护嗓子
 
 
 import os
+import csv
+import atexit
+import shutil
+import tempfile
+import queue
+import importlib.util
 import pandas as pd
-import pyttsx3
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QListWidget, QFileDialog, QMessageBox,
     QInputDialog
 )
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, QUrl, pyqtSignal
+try:
+    # 仅用于播放预合成语音，缺少QtMultimedia时关闭预合成
+    from PyQt5.QtMultimedia import QSoundEffect
+except ImportError:
+    QSoundEffect = None
 from datetime import datetime, time
 import re
 
+# xlsx读取引擎：优先使用calamine（Rust实现，速度更快），不可用时回退openpyxl
+# pandas 2.2起才支持engine='calamine'
+try:
+    import python_calamine  # noqa: F401
+    _pandas_version = tuple(int(x) for x in pd.__version__.split('.')[:2])
+    ENGINE = 'calamine' if _pandas_version >= (2, 2) else 'openpyxl'
+except ImportError:
+    ENGINE = 'openpyxl'
+
+# xlsx写出引擎：优先使用xlsxwriter（更快），未安装时回退openpyxl
+WRITE_ENGINE = 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else 'openpyxl'
+
+_CLASS_NAME_SCRUB = re.compile(r'[\\/*?:"<>|]')  # 文件名非法字符
+ATTENDANCE_FLUSH_SIZE = 10  # 考勤记录每累计多少条写盘一次
+
+
+# ================= 工具函数 =================
+def fast_to_excel(df, path):
+    """使用xlsxwriter引擎写出xlsx（比默认引擎快）"""
+    df.to_excel(path, index=False, engine=WRITE_ENGINE)
+
+
+def _write_header(path, headers):
+    """直接用xlsxwriter写出仅含表头的xlsx，绕过pandas写出流程"""
+    if WRITE_ENGINE != 'xlsxwriter':
+        fast_to_excel(pd.DataFrame(columns=headers), path)
+        return
+    import xlsxwriter
+    wb = xlsxwriter.Workbook(path)
+    ws = wb.add_worksheet()
+    ws.write_row(0, 0, headers)
+    wb.close()
+
+
+def atomic_write_df(df, path):
+    """先写临时文件再原子替换，避免写入中断导致文件损坏"""
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'w', newline='', encoding='utf-8-sig') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
 
 # ================= 数据管理模块 =================
 class DataManager:
@@ -30,31 +88,39 @@ class DataManager:
         # 强制创建数据目录（修复权限问题）
         os.makedirs(self.data_dir, exist_ok=True, mode=0o777)
 
-        # 初始化空白索引文件（如果不存在）
-        self.classes_path = os.path.join(self.data_dir, "classes.xlsx")
-        if not os.path.exists(self.classes_path):
-            pd.DataFrame(columns=["班级名称", "学生名单文件", "考勤文件", "统计文件"]
-                         ).to_excel(self.classes_path, index=False)
+        # 索引只在启动时读取一次，之后以内存数据为准
+        self.classes_path = os.path.join(self.data_dir, "classes.csv")
+        if os.path.exists(self.classes_path):
+            # 读取时即指定字段类型为字符串
+            self._classes_df = pd.read_csv(self.classes_path, encoding='utf-8-sig', dtype=str)
+        else:
+            # 初始化空白索引文件（兼容旧版classes.xlsx）
+            legacy_path = os.path.join(self.data_dir, "classes.xlsx")
+            if os.path.exists(legacy_path):
+                self._classes_df = pd.read_excel(legacy_path, engine=ENGINE, dtype=str)
+            else:
+                self._classes_df = pd.DataFrame(columns=["班级名称", "学生名单文件", "考勤文件", "统计文件"])
+            self._save_index()
+        # 班级名称集合，用于O(1)重复检查
+        self._class_names = set(self._classes_df["班级名称"].astype(str))
+
+    def _save_index(self):
+        """将内存中的班级索引写回文件"""
+        atomic_write_df(self._classes_df, self.classes_path)
 
     def load_classes(self):
         """修复数据加载类型问题[6](@ref)"""
-        if os.path.exists(self.classes_path):
-            df = pd.read_excel(self.classes_path)
-            # 强制转换字段类型为字符串
-            df["班级名称"] = df["班级名称"].astype(str)
-            return df.to_dict('records')
-        return []
+        return self._classes_df.to_dict('records')
 
     def save_class(self, class_name):
         """修复文件创建逻辑（关键修正点）"""
         # 清洗文件名（处理特殊字符）
-        base_name = re.sub(r'[\\/*?:"<>|]', '', class_name.strip())
-        base_name = base_name.replace(" ", "_")  # 空格转下划线
+        base_name = _CLASS_NAME_SCRUB.sub('', class_name.strip()).replace(" ", "_")  # 空格转下划线
 
         # 定义文件路径（增加路径存在性检查）
         files = {
             "students": os.path.join(self.data_dir, f"{base_name}_students.xlsx"),
-            "attendance": os.path.join(self.data_dir, f"{base_name}_attendance.xlsx"),
+            "attendance": os.path.join(self.data_dir, f"{base_name}_attendance.csv"),
             "stats": os.path.join(self.data_dir, f"{base_name}_stats.xlsx")
         }
 
@@ -62,15 +128,16 @@ class DataManager:
         try:
             for file_type, path in files.items():
                 os.makedirs(os.path.dirname(path), exist_ok=True, mode=0o777)
-                if not os.path.exists(path):
-                    pd.DataFrame(columns=self._get_headers(file_type)).to_excel(path, index=False)
+                if file_type == "attendance":
+                    self.ensure_attendance_log(path)
+                elif not os.path.exists(path):
+                    _write_header(path, self._get_headers(file_type))
         except Exception as e:
             raise RuntimeError(f"文件创建失败: {str(e)}")
 
 
         # 更新索引文件（增加重复检查）
-        df = pd.read_excel(self.classes_path)
-        if class_name in df["班级名称"].values:
+        if class_name in self._class_names:
             raise ValueError("班级名称已存在")
 
         new_row = pd.DataFrame([{
@@ -79,10 +146,25 @@ class DataManager:
             "考勤文件": files["attendance"],
             "统计文件": files["stats"]
         }])
-        updated_df = pd.concat([df, new_row], ignore_index=True)
-        updated_df.to_excel(self.classes_path, index=False)
+        self._classes_df = pd.concat([self._classes_df, new_row], ignore_index=True)
+        self._class_names.add(class_name)
+        self._save_index()
         return files
 
+    def delete_class(self, class_name):
+        """从索引中移除班级"""
+        # 精确匹配当前班级（考虑前后空格问题）；索引读取时已是字符串，无需再转换
+        mask = self._classes_df["班级名称"].str.strip().ne(str(class_name).strip())
+        self._class_names.difference_update(self._classes_df.loc[~mask, "班级名称"])
+        self._classes_df = self._classes_df.loc[mask]
+        self._save_index()
+
+    def set_students_file(self, class_name, path):
+        """更新班级对应的学生名单文件"""
+        mask = self._classes_df['班级名称'] == class_name
+        self._classes_df.loc[mask, '学生名单文件'] = path
+        self._save_index()
+
     def _get_headers(self, file_type):
         """统一管理文件表头"""
         headers = {
@@ -92,27 +174,125 @@ class DataManager:
         }
         return headers[file_type]
 
+    def append_attendance(self, path, records):
+        """批量追加考勤记录到考勤流水CSV"""
+        with open(path, 'a', newline='', encoding='utf-8-sig') as f:
+            csv.writer(f).writerows(record.values() for record in records)
+
+    def ensure_attendance_log(self, path):
+        """确保考勤流水CSV存在（兼容旧版xlsx考勤文件）"""
+        if os.path.exists(path):
+            return
+        legacy_path = os.path.splitext(path)[0] + ".xlsx"
+        if os.path.exists(legacy_path):
+            pd.read_excel(legacy_path, engine=ENGINE).to_csv(path, index=False, encoding='utf-8-sig')
+            return
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            csv.writer(f).writerow(self._get_headers("attendance"))
+
+    def export_attendance_xlsx(self, path):
+        """将考勤流水CSV导出为同名xlsx（会话结束时调用一次）"""
+        xlsx_path = os.path.splitext(path)[0] + ".xlsx"
+        # 只写模式逐行流式写出，不在内存中构建完整单元格表
+        import openpyxl
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.reader(f):
+                ws.append(row)
+        wb.save(xlsx_path)
+        return xlsx_path
+
 
 # ================= 语音播报模块 =================
-class VoiceThread(QThread):
-    finished = pyqtSignal()
+class PrefetchJob:
+    """预合成任务：把某位学生的姓名合成到wav文件"""
 
-    def __init__(self, name):
-        super().__init__()
+    def __init__(self, session, index, name, path):
+        self.session = session
+        self.index = index
         self.name = name
+        self.path = path
+        self.cancelled = False  # 已过期的预合成任务不再合成
+        self.ok = False
+
+
+class TTSWorker(QThread):
+    """常驻语音线程：语音引擎在此线程内创建且只在此线程使用
+
+    SAPI等驱动的事件回调绑定在创建引擎的线程上，跨线程调用runAndWait可能卡死，
+    因此播报与预合成都以任务形式排队交给本线程按顺序执行。
+    """
+    prefetched = pyqtSignal(object)  # 预合成任务处理完毕（成功与否见job.ok）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = queue.Queue()
+        self._engine = None
+
+    def say(self, name):
+        self._jobs.put(("say", name))
+
+    def prefetch(self, job):
+        self._jobs.put(("save", job))
+
+    def stop(self):
+        self._jobs.put(None)
+
+    def _get_engine(self):
+        """延迟加载语音引擎，缩短启动时间"""
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._engine.setProperty('rate', 150)  # 设置语速[3](@ref)
+            self._engine.setProperty('volume', 0.8)  # 设置音量[2](@ref)
+        return self._engine
+
+    def run(self):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                break
+            kind, payload = item
+            if kind == "say":
+                try:
+                    engine = self._get_engine()
+                    engine.say(f"{payload}")
+                    engine.runAndWait()
+                except Exception as e:
+                    print(f"语音异常: {str(e)}")
+            else:
+                try:
+                    if not payload.cancelled:
+                        engine = self._get_engine()
+                        engine.save_to_file(f"{payload.name}", payload.path)
+                        engine.runAndWait()
+                        payload.ok = True
+                except Exception as e:
+                    print(f"语音预合成异常: {str(e)}")
+                finally:
+                    self.prefetched.emit(payload)
+
+
+# ================= 后台读写模块 =================
+class TaskSignals(QObject):
+    error = pyqtSignal(str)
+
+
+class ExcelTask(QRunnable):
+    """在线程池中执行文件读写，避免阻塞界面"""
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = TaskSignals()
 
     def run(self):
-        """独立语音引擎实例避免冲突[1](@ref)"""
         try:
-            engine = pyttsx3.init()
-            engine.setProperty('rate', 150)  # 设置语速[3](@ref)
-            engine.setProperty('volume', 0.8)  # 设置音量[2](@ref)
-            engine.say(f"{self.name}")
-            engine.runAndWait()
+            self.fn(*self.args)
         except Exception as e:
-            print(f"语音异常: {str(e)}")
-        finally:
-            self.finished.emit()
+            self.signals.error.emit(str(e))
 
 
 # ================= 主界面模块 =================
@@ -125,8 +305,30 @@ class AttendanceSystem(QMainWindow):
         self.current_class = None
         self.current_files = {}
         self.students = []
+        self.stats_df = None  # 考勤期间统计仅在内存中累加
+        self._stats_row = {}  # 学号 -> 行号
+        self._stats_col = {}  # 状态 -> 列号
+        self.stats_path = None
+        self._pending_records = []  # 待写盘的考勤记录
+        self._attendance_path = None
+        # 单线程池保证写盘任务按提交顺序执行
+        self._io_pool = QThreadPool(self)
+        self._io_pool.setMaxThreadCount(1)
+        self._tts = TTSWorker(self)
+        self._tts.prefetched.connect(self._on_prefetched)
+        self._tts.start()
+        self._audio_dir = tempfile.mkdtemp(prefix="tts_")
+        self._audio_session = 0  # 每次开始考勤递增，用于丢弃过期的预合成结果
+        self._next_audio = None  # (会话号, 学生序号, 姓名, wav路径)
+        self._prefetch_jobs = set()  # 已提交但尚未处理完的预合成任务
+        self._play_when_ready = None  # 等待预合成完成后播放的(会话号, 学生序号)
+        self._sound = None
+        self._sound_name = None  # 正在播放的预合成语音对应的姓名，播放失败时改为实时播报
+        if QSoundEffect is not None:
+            self._sound = QSoundEffect(self)
+            self._sound.statusChanged.connect(self._on_sound_status)
         self.initUI()
-        self.data_dir = "data"
+        atexit.register(self._flush_attendance, sync=True)
 
     def initUI(self):
         self.setWindowTitle('智能考勤系统')
@@ -195,11 +397,16 @@ class AttendanceSystem(QMainWindow):
 
         try:
             # 调用修正后的保存方法（关键新增）
-            self.data_manager.save_class(class_name)
+            files = self.data_manager.save_class(class_name)
 
-            # 更新界面
+            # 更新界面（直接追加，无需重新加载索引）
             self.class_list.addItem(class_name)
-            self.classes = self.data_manager.load_classes()
+            self.classes.append({
+                "班级名称": class_name,
+                "学生名单文件": files["students"],
+                "考勤文件": files["attendance"],
+                "统计文件": files["stats"]
+            })
             QMessageBox.information(self, "成功", f"班级 [{class_name}] 创建成功")
 
         except ValueError as e:
@@ -213,7 +420,8 @@ class AttendanceSystem(QMainWindow):
             if cls["班级名称"] == self.current_class:
                 self.current_files = {
                     "students": cls["学生名单文件"],
-                    "attendance": cls["考勤文件"],
+                    # 考勤流水统一使用CSV追加写入（旧版xlsx路径自动映射）
+                    "attendance": os.path.splitext(cls["考勤文件"])[0] + ".csv",
                     "stats": cls["统计文件"]
                 }
                 break
@@ -234,6 +442,11 @@ class AttendanceSystem(QMainWindow):
             if confirm != QMessageBox.Yes:
                 return
 
+            # 先写完未落盘的数据再移动文件
+            self._io_pool.waitForDone()
+            self._flush_attendance(sync=True)
+            self._flush_stats(sync=True)
+
             # 创建备份目录（按日期归档）
             backup_dir = os.path.join(
                 self.data_manager.data_dir,
@@ -244,8 +457,11 @@ class AttendanceSystem(QMainWindow):
 
             # 备份并删除文件（带异常处理）
             deleted_files = []
-            for file_type in ["students", "attendance", "stats"]:
-                src = self.current_files.get(file_type, "")
+            attendance = self.current_files.get("attendance", "")
+            sources = [self.current_files.get(file_type, "") for file_type in ["students", "attendance", "stats"]]
+            if attendance:
+                sources.append(os.path.splitext(attendance)[0] + ".xlsx")  # 导出的考勤报表
+            for src in sources:
                 if src and os.path.exists(src):
                     # 生成带时间戳的备份文件名
                     timestamp = datetime.now().strftime("%H%M%S")
@@ -254,14 +470,9 @@ class AttendanceSystem(QMainWindow):
                     deleted_files.append(dst)
 
             # 更新班级索引文件
-            class_index_path = self.data_manager.classes_path
-            if os.path.exists(class_index_path):
-                df = pd.read_excel(class_index_path)
-                # 精确匹配当前班级（考虑前后空格问题）
-                current_class = str(self.current_class).strip()
-                df["班级名称"] = df["班级名称"].astype(str).str.strip()
-                df = df[df["班级名称"] != current_class]
-                df.to_excel(class_index_path, index=False)
+            self.data_manager.delete_class(self.current_class)
+            current_class = str(self.current_class).strip()
+            self.classes = [c for c in self.classes if str(c["班级名称"]).strip() != current_class]
 
             # 更新界面显示
             current_row = self.class_list.currentRow()
@@ -271,6 +482,8 @@ class AttendanceSystem(QMainWindow):
                 self.current_class = None
                 self.current_files = {}
                 self.students = []
+                self.stats_df = None
+                self._pending_records = []
 
             # 显示操作结果
             result_msg = f"已删除班级：{self.current_class}\n"
@@ -291,8 +504,32 @@ class AttendanceSystem(QMainWindow):
             return
 
         try:
-            self.students = pd.read_excel(self.current_files["students"]).to_dict('records')
+            # 保存上一轮未完成的考勤与统计
+            self._io_pool.waitForDone()
+            self._flush_attendance(sync=True)
+            self._flush_stats(sync=True)
+
+            # 先全部读取到局部变量，成功后再统一切换会话状态，避免新旧班级数据混用
+            students = pd.read_excel(self.current_files["students"], engine=ENGINE).to_dict('records')
+            attendance_path = self.current_files["attendance"]
+            self.data_manager.ensure_attendance_log(attendance_path)
+
+            # 统计数据只在会话开始时读取一次
+            stats_path = self.current_files["stats"]
+            stats_df = pd.read_excel(stats_path, engine=ENGINE)
+            stats_row = {sid: i for i, sid in enumerate(stats_df['学号'].tolist())}
+            stats_col = {status: stats_df.columns.get_loc(status)
+                         for status in ("出勤", "旷课", "请假")}
+
+            self.students = students
+            self._attendance_path = attendance_path
+            self.stats_df = stats_df
+            self._stats_row = stats_row
+            self._stats_col = stats_col
+            self.stats_path = stats_path
             self.current_index = 0
+
+            self._reset_audio()
             self.update_student_display()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"数据加载失败：{str(e)}")
@@ -301,8 +538,78 @@ class AttendanceSystem(QMainWindow):
         """修复重复播报功能[1](@ref)"""
         if 0 <= self.current_index < len(self.students):
             current_student = self.students[self.current_index]["姓名"]
-            self.voice_thread = VoiceThread(current_student)  # 播报当前学生
-            self.voice_thread.start()
+            key = (self._audio_session, self.current_index, current_student)
+            self._play_when_ready = None
+            cached = self._next_audio
+            if (self._sound is not None and cached and cached[:3] == key
+                    and os.path.exists(cached[3])):
+                # 已预合成则直接播放，无需等待语音合成
+                self._play_audio(cached[3], current_student)
+                return
+            if any((j.session, j.index, j.name) == key and not j.cancelled
+                   for j in self._prefetch_jobs):
+                # 正在预合成当前学生，完成后直接播放，避免重复合成
+                self._play_when_ready = key[:2]
+                return
+            self._tts.say(current_student)  # 播报当前学生
+
+    def _play_audio(self, path, name):
+        self._sound_name = name
+        self._sound.setSource(QUrl.fromLocalFile(path))
+        if self._sound.status() == QSoundEffect.Error:
+            self._on_sound_status()
+            return
+        self._sound.play()
+
+    def _on_sound_status(self):
+        """预合成语音无法播放（如非PCM WAV或无音频后端）时退回实时播报，并停用预合成"""
+        if self._sound.status() != QSoundEffect.Error or self._sound_name is None:
+            return
+        name, self._sound_name = self._sound_name, None
+        self._sound.statusChanged.disconnect(self._on_sound_status)
+        self._sound.deleteLater()
+        self._sound = None
+        self._next_audio = None
+        self._tts.say(name)
+
+    def _reset_audio(self):
+        """结束当前会话的预合成：取消未完成任务并清空缓存"""
+        self._audio_session += 1
+        for job in self._prefetch_jobs:
+            job.cancelled = True
+        self._next_audio = None
+        self._play_when_ready = None
+
+    def _prefetch_next(self):
+        """预合成下一位学生的语音（排在当前播报之后执行）"""
+        if self._sound is None:
+            return
+        # 取消已经用不上的旧任务
+        for job in self._prefetch_jobs:
+            if job.session != self._audio_session or job.index < self.current_index:
+                job.cancelled = True
+
+        next_index = self.current_index + 1
+        if next_index >= len(self.students):
+            return
+        job = PrefetchJob(
+            self._audio_session,
+            next_index,
+            self.students[next_index]["姓名"],
+            os.path.join(self._audio_dir, f"{self._audio_session}_{next_index}.wav")
+        )
+        self._prefetch_jobs.add(job)
+        self._tts.prefetch(job)
+
+    def _on_prefetched(self, job):
+        self._prefetch_jobs.discard(job)
+        if job.session != self._audio_session:
+            return
+        if job.ok:
+            self._next_audio = (job.session, job.index, job.name, job.path)
+        if self._play_when_ready == (job.session, job.index) and job.index == self.current_index:
+            # 预合成成功则直接播放，失败时退回实时播报
+            self.replay_name()
 
     def record_status(self, status):
         if not self.current_files.get("attendance"):
@@ -322,34 +629,79 @@ class AttendanceSystem(QMainWindow):
                 "时间": timestamp.strftime('%H:%M:%S')
             }
 
-            # 更新考勤文件
-            # 读取现有数据
-            existing = pd.read_excel(self.current_files["attendance"])
-            # 合并新记录
-            updated = pd.concat([existing, pd.DataFrame([record])], ignore_index=True)
-            # 覆盖写入
-            updated.to_excel(self.current_files["attendance"], index=False)
+            # 缓存考勤记录，累计一定条数后批量追加写入
+            self._pending_records.append(record)
+            if len(self._pending_records) >= ATTENDANCE_FLUSH_SIZE:
+                self._flush_attendance()
 
-            # 更新统计
-            stats_df = pd.read_excel(self.current_files["stats"])
-            stats_df.loc[stats_df['学号'] == student["学号"], status] += 1
-            stats_df.to_excel(self.current_files["stats"], index=False)
+            # 更新内存统计
+            row = self._stats_row.get(student["学号"])
+            if row is not None:
+                self.stats_df.iat[row, self._stats_col[status]] += 1
 
             # 切换下个学生
             self.current_index += 1
             if self.current_index < len(self.students):
                 self.update_student_display()
             else:
+                self._flush_attendance()
+                self._flush_stats()
+                self._run_io(self.data_manager.export_attendance_xlsx, self._attendance_path)
                 QMessageBox.information(self, "完成", "本班考勤已完成")
 
         except Exception as e:
             QMessageBox.critical(self, "错误", f"记录失败：{str(e)}")
 
+    def _run_io(self, fn, *args, sync=False):
+        """执行文件读写：默认提交到后台线程池，sync=True时在当前线程执行"""
+        if sync:
+            fn(*args)
+            return
+        task = ExcelTask(fn, *args)
+        task.signals.error.connect(self._on_io_error)
+        self._io_pool.start(task)
+
+    def _on_io_error(self, message):
+        QMessageBox.critical(self, "错误", f"文件写入失败：{message}")
+
+    def _flush_attendance(self, sync=False):
+        """将缓存的考勤记录批量追加到考勤流水CSV"""
+        if not self._pending_records or not self._attendance_path:
+            return
+        self._run_io(self.data_manager.append_attendance,
+                     self._attendance_path, self._pending_records, sync=sync)
+        self._pending_records = []
+
+    def _flush_stats(self, sync=False):
+        """将内存中的统计数据一次性写回文件"""
+        if self.stats_df is not None and self.stats_path:
+            self._run_io(fast_to_excel, self.stats_df, self.stats_path, sync=sync)
+        self.stats_df = None
+        self.stats_path = None
+        self._stats_row = {}
+        self._stats_col = {}
+
+    def closeEvent(self, event):
+        """退出前保存未完成的考勤与统计"""
+        try:
+            self._io_pool.waitForDone()
+            self._flush_attendance(sync=True)
+            self._flush_stats(sync=True)
+        except Exception as e:
+            print(f"统计保存失败: {str(e)}")
+        # 等待语音线程结束后再删除临时目录
+        self._reset_audio()
+        self._tts.stop()
+        self._tts.wait()
+        shutil.rmtree(self._audio_dir, ignore_errors=True)
+        super().closeEvent(event)
+
     def update_student_display(self):
         """更新学生显示并播报"""
         current_student = self.students[self.current_index]["姓名"]
         self.student_label.setText(f'当前学生：{current_student}')
         self.replay_name()  # 自动播报新学生
+        self._prefetch_next()  # 播报同时预合成下一位
 
 
     def import_students(self):
@@ -368,16 +720,17 @@ class AttendanceSystem(QMainWindow):
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"文件不存在: {file_path}")
 
-            # 动态处理不同文件格式
+            # 动态处理不同文件格式（只解析必要字段，按字符串读取以保留学号前导零）
+            required_columns = {'学号', '姓名'}
+            read_options = {"usecols": lambda col: col in required_columns, "dtype": 'string'}
             if file_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path, engine='openpyxl')
+                df = pd.read_excel(file_path, engine=ENGINE, **read_options)
             elif file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, encoding='utf-8-sig')
+                df = pd.read_csv(file_path, encoding='utf-8-sig', **read_options)
             else:
                 raise ValueError("不支持的格式")
 
             # 关键字段校验
-            required_columns = {'学号', '姓名'}
             if not required_columns.issubset(df.columns):
                 missing = required_columns - set(df.columns)
                 raise ValueError(f"缺少必要字段: {', '.join(missing)}")
@@ -397,15 +750,34 @@ class AttendanceSystem(QMainWindow):
                 f"{base_name}_students.xlsx"
             )
 
+            # 等待后台写盘任务完成，避免与统计/名单文件的写入交错
+            self._io_pool.waitForDone()
+
+            # 本班正在考勤时先结束会话，避免旧名单的统计覆盖新建的统计表
+            if self.stats_df is not None and self.stats_path == self.current_files.get("stats"):
+                self._flush_attendance(sync=True)
+                self.stats_df = None
+                self._stats_row = {}
+                self._stats_col = {}
+                self.students = []
+                self.current_index = 0
+                self.student_label.setText('当前学生：无')
+                self._reset_audio()
+
             # 写入前创建目录
             os.makedirs(os.path.dirname(target_path), exist_ok=True)
-            df.to_excel(target_path, index=False)
+            fast_to_excel(df, target_path)
 
             # 更新索引文件
-            classes_df = pd.read_excel(self.data_manager.classes_path)
-            mask = classes_df['班级名称'] == self.current_class
-            classes_df.loc[mask, '学生名单文件'] = target_path
-            classes_df.to_excel(self.data_manager.classes_path, index=False)
+            self.data_manager.set_students_file(self.current_class, target_path)
+            for cls in self.classes:
+                if cls["班级名称"] == self.current_class:
+                    cls["学生名单文件"] = target_path
+            self.current_files["students"] = target_path
+
+            # 按导入的名单一次性构建统计表
+            stats_df = df.assign(出勤=0, 旷课=0, 请假=0)
+            fast_to_excel(stats_df, self.current_files["stats"])
 
             QMessageBox.information(self, "成功",
                                     f"已导入{len(df)}条学生记录\n保存路径: {target_path}")
@@ -421,29 +793,6 @@ class AttendanceSystem(QMainWindow):
 
             QMessageBox.critical(self, "错误", error_msg)
 
-        files = {
-            "students": os.path.join(self.data_dir, f"{base_name}_students.xlsx"),
-            "attendance": os.path.join(self.data_dir, f"{base_name}_attendance.xlsx"),
-            "stats": os.path.join(self.data_dir, f"{base_name}_stats.xlsx")
-        }
-
-        # DataManager.save_class()中初始化统计文件时：
-        stats_df = pd.DataFrame(columns=["学号", "姓名", "出勤", "旷课", "请假"])
-
-        # 遍历学生名单填充初始值（修复append问题）
-        students_df = pd.read_excel(files['students'])
-        for _, student in students_df.iterrows():
-            new_row = pd.DataFrame([{
-                "学号": student["学号"],
-                "姓名": student["姓名"],
-                "出勤": 0,
-                "旷课": 0,
-                "请假": 0
-            }])
-            stats_df = pd.concat([stats_df, new_row], ignore_index=True)
-
-        stats_df.to_excel(files["stats"], index=False)
-
 
 if __name__ == '__main__':
     app = QApplication([])